@@ -1,34 +1,153 @@
 import pandas as pd
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne, WriteConcern
+from pymongo.errors import BulkWriteError, OperationFailure
 from azure.cosmos import CosmosClient, PartitionKey, exceptions
 import logging
 from datetime import datetime
 import json
 import uuid
+import hashlib
+import atexit
+from functools import lru_cache
+from operator import itemgetter
+from itertools import islice
 
 logger = logging.getLogger(__name__)
 
 PARTITION_KEY = '/id'  # Define a consistent partition key
-
+MONGO_BATCH_SIZE = 1000  # Operations sent per bulk write
+MONGO_READ_BATCH_SIZE = 5000  # Documents returned per cursor batch when reading a whole collection
+
+# Collection/container holding the ETag and body of the last response from each GitHub endpoint
+API_CACHE_COLLECTION = '_meta'
+# Document in the same collection recording how far each GraphQL star/fork connection has been paged
+GRAPHQL_CURSORS_ID = 'graphql_cursors'
+
+# GitHub re-serves the last 14 days of traffic and clones on every run, so these writes only wait
+# for the primary's in-memory acknowledgement instead of replication and the journal
+FAST_WRITE_COLLECTIONS = {'TrafficStats', 'GitClones'}
+FAST_WRITE_CONCERN = WriteConcern(w=1, j=False)
+
+# Field each MongoDB collection is upserted on
+UNIQUE_FIELD_MAP = {
+    'TrafficStats': 'Date',
+    'GitClones': 'Date',
+    'ReferringSites': 'Referring site',
+    'PopularContent': 'Path',
+    'Stars': 'Date',
+    'Forks': 'Date',
+    'About': 'Repo Name'
+}
+
+# Databases whose indexes this process has already ensured; warm Function hosts rerun the report in-process
+INDEXED_DATABASES = set()
+
+# Clients are cached per connection string so warm Function hosts and --repos-file workers reuse their
+# connection pools across repositories; each is closed when the process exits
+@lru_cache(maxsize=None)
 def get_mongo_client(connection_string):
     logger.info("Creating MongoDB client")
     client = MongoClient(connection_string)
+    atexit.register(client.close)
     logger.info("MongoDB client created successfully")
     return client
 
+@lru_cache(maxsize=None)
 def get_cosmos_client(connection_string):
     logger.info("Creating Cosmos DB client")
     client = CosmosClient.from_connection_string(connection_string)
+    atexit.register(client.close)
     logger.info("Cosmos DB client created successfully")
     return client
 
+def ensure_mongo_indexes(client, database_name):
+    """Create a unique index on each collection's upsert field so upserts use it."""
+    if database_name in INDEXED_DATABASES:
+        return
+    db = client[database_name]
+    for collection_name, unique_field in UNIQUE_FIELD_MAP.items():
+        try:
+            db[collection_name].create_index(unique_field, unique=True)
+        except OperationFailure as e:
+            # Collections holding duplicates from older runs cannot take a unique index
+            logger.warning(f"Could not create unique index on {collection_name}.{unique_field}: {e}")
+    INDEXED_DATABASES.add(database_name)
+
+def load_api_cache(client, database_name, db_type="mongodb"):
+    """Load the cached GitHub responses as {endpoint: {'etag': ..., 'last_body': ...}}."""
+    if db_type == "mongodb":
+        documents = client[database_name][API_CACHE_COLLECTION].find({'etag': {'$exists': True}})
+        return {doc['_id']: {'etag': doc['etag'], 'last_body': doc['last_body']} for doc in documents}
+    elif db_type == "cosmosdb":
+        try:
+            container = client.get_database_client(database_name).get_container_client(API_CACHE_COLLECTION)
+            # Skip anything that is not a cached response, such as documents migrated from MongoDB's _meta
+            items = container.query_items("SELECT * FROM c WHERE IS_DEFINED(c.endpoint) AND IS_DEFINED(c.etag)",
+                                          enable_cross_partition_query=True)
+            return {item['endpoint']: {'etag': item['etag'], 'last_body': item['last_body']} for item in items}
+        except exceptions.CosmosResourceNotFoundError:
+            return {}
+    else:
+        raise ValueError(f"Unsupported database type: {db_type}")
+
+def save_api_cache(client, database_name, api_cache, db_type="mongodb"):
+    """Persist the ETag and body of each cached GitHub response for the next run."""
+    if not api_cache:
+        return
+    logger.info(f"Saving {len(api_cache)} cached GitHub responses to {db_type} database: {database_name}")
+    if db_type == "mongodb":
+        operations = [UpdateOne({'_id': endpoint}, {'$set': entry}, upsert=True) for endpoint, entry in api_cache.items()]
+        client[database_name][API_CACHE_COLLECTION].bulk_write(operations, ordered=False)
+    elif db_type == "cosmosdb":
+        container = create_cosmos_container_if_not_exists(client, database_name, API_CACHE_COLLECTION)
+        for endpoint, entry in api_cache.items():
+            # Cosmos DB ids cannot contain '/', so key items by a hash of the endpoint URL
+            container.upsert_item({'id': hashlib.sha1(endpoint.encode()).hexdigest(), 'endpoint': endpoint, **entry})
+    else:
+        raise ValueError(f"Unsupported database type: {db_type}")
+
+def load_graphql_cursors(client, database_name):
+    """Load the MongoDB-stored end cursor of each GraphQL connection as {connection: cursor}."""
+    document = client[database_name][API_CACHE_COLLECTION].find_one({'_id': GRAPHQL_CURSORS_ID}, {'_id': 0})
+    return document or {}
+
+def save_graphql_cursors(client, database_name, cursors):
+    """Persist the end cursor of each GraphQL connection so the next run resumes after it."""
+    if not cursors:
+        return
+    client[database_name][API_CACHE_COLLECTION].update_one({'_id': GRAPHQL_CURSORS_ID}, {'$set': cursors}, upsert=True)
+
+def get_latest_total(client, database_name, collection_name, total_field):
+    """Return the highest running total stored in a MongoDB collection, or 0 if it has none."""
+    document = client[database_name][collection_name].find_one({}, {total_field: 1, '_id': 0}, sort=[(total_field, -1)])
+    return document.get(total_field, 0) if document else 0
+
+def delete_other_dates_from_mongodb(client, database_name, collection_name, dates, date_field='Date'):
+    """Delete the documents whose date is not in dates, once a full rebuild of the collection has been upserted."""
+    result = client[database_name][collection_name].delete_many({date_field: {'$nin': list(dates)}})
+    logger.info(f"Deleted {result.deleted_count} stale documents from MongoDB collection: {collection_name}")
+
+def sort_by_date(df, date_column='Date'):
+    """Sort a frame chronologically by its MM-DD-YYYY date column; the sort is stable so equal dates keep their order."""
+    if df.empty:
+        return df
+    # The stored strings compare alphabetically (01-01-2025 before 12-30-2024), so sort on the parsed dates
+    return df.sort_values(
+        by=date_column,
+        key=lambda dates: pd.to_datetime(dates, format='%m-%d-%Y', errors='coerce'),
+        kind='mergesort',
+        ignore_index=True
+    )
+
 def fetch_all_data_from_mongodb(client, database_name, collection_name):
     logger.info(f"Fetching all data from MongoDB database: {database_name}, collection: {collection_name}")
     db = client[database_name]
     collection = db[collection_name]
-    data = list(collection.find({}, {'_id': 0}))  # Exclude the Mongo ID
-    logger.info(f"Fetched {len(data)} records from MongoDB")
-    return pd.DataFrame(data)
+    cursor = collection.find({}, {'_id': 0}, batch_size=MONGO_READ_BATCH_SIZE)  # Exclude the Mongo ID
+    # batch_size cuts the getMore round trips; from_records still collects the documents before building the frame
+    df = pd.DataFrame.from_records(cursor)
+    logger.info(f"Fetched {len(df)} records from MongoDB")
+    return df
 
 def fetch_all_data_from_cosmosdb(client, database_name, container_name):
     logger.info(f"Fetching all data from Cosmos DB database: {database_name}, container: {container_name}")
@@ -45,25 +164,33 @@ def fetch_all_data_from_cosmosdb(client, database_name, container_name):
 
 def append_new_data(client, database_name, collection_name, new_data, date_column, db_type="mongodb"):
     logger.info(f"Appending new data to {db_type} database: {database_name}, collection: {collection_name}")
+    new_df = pd.DataFrame(new_data)
+
+    # The traffic processors already emit MM-DD-YYYY dates, leaving missing ones for timestamps they could
+    # not parse; those rows would be stored with a null key, so drop them up front
+    if date_column in new_df.columns:
+        new_df = new_df.dropna(subset=[date_column])
+
     if db_type == "mongodb":
-        old_df = fetch_all_data_from_mongodb(client, database_name, collection_name)
+        # Upsert just the new rows; MongoDB merges them with the history, which is then put in date order
+        save_to_mongodb(client, database_name, collection_name, dataframe_records(new_df))
+        combined_df = sort_by_date(fetch_all_data_from_mongodb(client, database_name, collection_name), date_column)
     elif db_type == "cosmosdb":
         old_df = fetch_all_data_from_cosmosdb(client, database_name, collection_name)
+        if old_df.empty:
+            # First run for this container: GitHub returns one row per day in date order, so there is nothing to merge
+            logger.info(f"Appended {len(new_df)} new records to {db_type} database")
+            return new_df.reset_index(drop=True)
+        if date_column in old_df.columns:
+            old_df[date_column] = pd.to_datetime(old_df[date_column], errors='coerce').dt.strftime('%m-%d-%Y')
+
+        combined_df = pd.concat([old_df, new_df], ignore_index=True)
+        # Sort first; the stable sort keeps new rows after stored ones for the same day,
+        # so keep='last' still prefers them and the dedupe runs on an already ordered frame
+        combined_df = sort_by_date(combined_df, date_column).drop_duplicates(subset=[date_column], keep='last')
     else:
         raise ValueError(f"Unsupported database type: {db_type}")
 
-    new_df = pd.DataFrame(new_data)
-
-    # Ensure date columns are in MM-DD-YYYY format
-    if date_column in new_df.columns:
-        new_df[date_column] = pd.to_datetime(new_df[date_column], errors='coerce').dt.strftime('%m-%d-%Y')
-    if date_column in old_df.columns:
-        old_df[date_column] = pd.to_datetime(old_df[date_column], errors='coerce').dt.strftime('%m-%d-%Y')
-
-    combined_df = pd.concat([old_df, new_df], ignore_index=True)
-    combined_df.drop_duplicates(subset=[date_column], keep='last', inplace=True)
-    combined_df.sort_values(by=date_column, inplace=True)
-
     logger.info(f"Appended {len(new_df)} new records to {db_type} database")
     return combined_df
 
@@ -98,31 +225,47 @@ def create_cosmos_container_if_not_exists(client, database_name, container_name)
             logger.error(f"Failed to create container: {e}")
             raise
 
+def dataframe_records(df):
+    """Yield a dataframe's rows as dicts one at a time instead of building the whole to_dict('records') list."""
+    columns = list(df.columns)
+    for row in df.itertuples(index=False, name=None):
+        yield dict(zip(columns, row))
+
 def save_to_mongodb(client, database_name, collection_name, data):
     logger.info(f"Saving data to MongoDB database: {database_name}, collection: {collection_name}")
     db = client[database_name]
     collection = db[collection_name]
 
-    unique_field_map = {
-        'TrafficStats': 'Date',
-        'GitClones': 'Date',
-        'ReferringSites': 'Referring site',
-        'PopularContent': 'Path',
-        'Stars': 'Date',
-        'Forks': 'Date',
-        'About': 'Repo Name'  # Added 'About' collection
-    }
-
-    if collection_name not in unique_field_map:
+    if collection_name not in UNIQUE_FIELD_MAP:
         raise ValueError(f"Unknown collection name: {collection_name}")
 
-    unique_field = unique_field_map[collection_name]
-    for item in data:
-        query = {unique_field: item.get(unique_field)}
-        update = {"$set": item}
-        collection.update_one(query, update, upsert=True)
+    unique_field = UNIQUE_FIELD_MAP[collection_name]
+    if collection_name in FAST_WRITE_COLLECTIONS:
+        collection = collection.with_options(write_concern=FAST_WRITE_CONCERN)
+    # data may be a generator, so it is consumed in MONGO_BATCH_SIZE slices rather than indexed
+    records = iter(data)
+    saved = 0
+    if collection.estimated_document_count() == 0:
+        # Initial load: nothing to match against, so plain inserts are enough
+        for batch in iter(lambda: list(islice(records, MONGO_BATCH_SIZE)), []):
+            try:
+                collection.insert_many(batch, ordered=False)
+            except BulkWriteError as e:
+                # Unordered inserts carry on past duplicate keys (repeated rows, or another run filling the
+                # collection at the same time); anything else is a real failure
+                write_errors = e.details.get('writeErrors', [])
+                if e.details.get('writeConcernErrors') or any(error['code'] != 11000 for error in write_errors):
+                    raise
+                logger.warning(f"Skipped {len(write_errors)} duplicate records in MongoDB collection: {collection_name}")
+            saved += len(batch)
+    else:
+        unique_value = itemgetter(unique_field)
+        operations = (UpdateOne({unique_field: unique_value(item)}, {"$set": item}, upsert=True) for item in records)
+        for batch in iter(lambda: list(islice(operations, MONGO_BATCH_SIZE)), []):
+            collection.bulk_write(batch, ordered=False)
+            saved += len(batch)
 
-    logger.info(f"Saved {len(data)} records to MongoDB collection: {collection_name}")
+    logger.info(f"Saved {saved} records to MongoDB collection: {collection_name}")
 
 def validate_json(data):
     """Validate if data is JSON serializable"""
@@ -361,8 +504,13 @@ def save_to_cosmosdb(client, database_name, container_name, data, owner, repo):
 def save_data(client, database_name, collection_name, data, db_type, owner, repo):
     logger.info(f"Saving data to {db_type} database: {database_name}, collection/container: {collection_name}")
     if db_type == "mongodb":
+        # MongoDB takes the rows as they are generated, one write batch at a time
+        if isinstance(data, pd.DataFrame):
+            data = dataframe_records(data)
         save_to_mongodb(client, database_name, collection_name, data)
     elif db_type == "cosmosdb":
+        if isinstance(data, pd.DataFrame):
+            data = data.to_dict('records')
         save_to_cosmosdb(client, database_name, collection_name, data, owner, repo)
     else:
         raise ValueError(f"Unsupported database type: {db_type}")
@@ -8,6 +8,8 @@ import time
 import datetime
 import json
 
+from db import API_CACHE_COLLECTION
+
 # Configure logging
 log_file = 'migration_errors.log'
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -121,8 +123,9 @@ def migrate_database(mongo_client, cosmos_client, db_name):
         # Create corresponding database in Cosmos DB (if it doesn't exist)
         cosmos_database = cosmos_client.create_database_if_not_exists(id=db_name)
 
-        # Get all collections from MongoDB database
-        collections = mongo_db.list_collection_names()
+        # Get all collections from MongoDB database, except the GitHub response cache and GraphQL cursors:
+        # their documents are keyed by URL, and Cosmos DB keeps its own cache under hashed ids
+        collections = [name for name in mongo_db.list_collection_names() if name != API_CACHE_COLLECTION]
 
         # Use ThreadPoolExecutor to migrate collections in parallel
         with ThreadPoolExecutor(max_workers=5) as executor:
@@ -1,34 +1,110 @@
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 from datetime import datetime, timedelta
-from azure.storage.blob import BlobServiceClient, BlobSasPermissions, generate_blob_sas
-from azure.core.exceptions import ResourceExistsError
+from azure.storage.blob import BlobServiceClient, BlobSasPermissions, ContentSettings, generate_blob_sas
+from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
 from azure.identity import DefaultAzureCredential
 import logging
 import argparse
+import atexit
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from io import BytesIO
-from openpyxl.styles import Font, NamedStyle
-from openpyxl.utils import get_column_letter
-from openpyxl import Workbook
+import orjson
+import xlsxwriter
 
 # Import required classes from azure.cosmos
 from azure.cosmos import CosmosClient, PartitionKey, exceptions
 
-from db import get_mongo_client, get_cosmos_client, append_new_data, save_data
+from db import (get_mongo_client, get_cosmos_client, ensure_mongo_indexes, load_api_cache, save_api_cache,
+                load_graphql_cursors, save_graphql_cursors, get_latest_total, delete_other_dates_from_mongodb,
+                fetch_all_data_from_mongodb, sort_by_date,
+                append_new_data, save_data)
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+
+BLOB_CONTENT_TYPES = {
+    '.json': 'application/json',
+    '.parquet': 'application/vnd.apache.parquet',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+# Blobs larger than one block are split into 4 MiB blocks so max_concurrency can upload them in parallel;
+# the SDK default only splits blobs over 64 MiB
+BLOB_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Byte table for sanitize_name: ASCII letters and digits pass through, every other byte becomes a dash.
+# Azure container names must be ASCII, so accented letters are not kept even though they are alphanumeric
+SANITIZE_TABLE = bytes(byte if chr(byte).isascii() and chr(byte).isalnum() else ord('-') for byte in range(256))
+
+# Containers already created or confirmed by this process, keyed by (account, container)
+CREATED_CONTAINERS = set()
+
+# One pooled session for every GitHub call so TLS connections are kept alive and reused
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(total=5, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504],
+                      allowed_methods=['GET', 'POST'], raise_on_status=False)
+))
+# requests already advertises gzip, but say so explicitly so GitHub always compresses the JSON
+SESSION.headers['Accept-Encoding'] = 'gzip'
+# Pin the media type so GitHub serves the stable REST representation
+SESSION.headers['Accept'] = 'application/vnd.github+json'
+
+# Seconds to wait to connect to GitHub and then for its response before the retry policy takes over;
+# a short connect timeout fails fast on an unreachable host
+GITHUB_TIMEOUT = (5, 30)
+
+# Collection and running-total column fed by each GraphQL connection that MongoDB fetches incrementally
+INCREMENTAL_CONNECTIONS = {
+    'stargazers': ('Stars', 'Total Stars'),
+    'forks': ('Forks', 'Total Forks')
+}
+
+# Stars and forks are paged through GraphQL: 100 items per request, and only the timestamps come back
+STARGAZERS_QUERY = """
+query($owner: String!, $repo: String!, $cursor: String) {
+  repository(owner: $owner, name: $repo) {
+    stargazers(first: 100, after: $cursor, orderBy: {field: STARRED_AT, direction: ASC}) {
+      totalCount
+      pageInfo { endCursor hasNextPage }
+      edges { starredAt }
+    }
+  }
+}
+"""
+
+FORKS_QUERY = """
+query($owner: String!, $repo: String!, $cursor: String) {
+  repository(owner: $owner, name: $repo) {
+    forks(first: 100, after: $cursor, orderBy: {field: CREATED_AT, direction: ASC}) {
+      totalCount
+      pageInfo { endCursor hasNextPage }
+      edges { node { createdAt } }
+    }
+  }
+}
+"""
+
 def sanitize_name(name):
     """Replaces non-alphanumeric characters with dashes and converts to lowercase."""
-    return ''.join(char if char.isalnum() else '-' for char in name).lower()
+    # Non-ASCII characters are first encoded as '?', which the table then turns into a dash
+    return name.encode('ascii', 'replace').translate(SANITIZE_TABLE).decode('ascii').lower()
 
 def retrieve_and_process_stats(owner, repo, filename,
                                db_connection_string, db_type,
                                azure_storage_connection_string,
                                output_format, token, use_managed_identity):
+    """Fetch, store and report one repository's stats; return True if the run completed, False if it failed or stopped early."""
     try:
         base_url = f"https://api.github.com/repos/{owner}/{repo}"
         sanitized_repo = sanitize_name(repo)
@@ -40,11 +116,54 @@ def retrieve_and_process_stats(owner, repo, filename,
         logger.info(f"Filename: {filename}")
         logger.info(f"Database type: {db_type}")
 
+        # Authenticate every GitHub request made through the shared session
+        SESSION.headers['Authorization'] = f'token {token}'
+
         # Create database client
         db_client = get_db_client(db_connection_string, db_type)
+        if db_type == "mongodb":
+            ensure_mongo_indexes(db_client, sanitized_repo)
+
+        # MongoDB remembers how far the star and fork connections were paged, so only newer edges are fetched;
+        # a cursor is only trusted while its collection still holds the running total to continue from
+        graphql_cursors = {}
+        base_totals = {}
+        if db_type == "mongodb":
+            for connection, cursor in load_graphql_cursors(db_client, sanitized_repo).items():
+                collection_name, total_field = INCREMENTAL_CONNECTIONS[connection]
+                base_total = get_latest_total(db_client, sanitized_repo, collection_name, total_field)
+                if base_total:
+                    graphql_cursors[connection] = cursor
+                    base_totals[connection] = base_total
+        resumed_connections = set(base_totals)
+
+        # Fetch repository info and data from GitHub API; the calls are independent so run them concurrently
+        api_cache = load_api_cache(db_client, sanitized_repo, db_type)
+        github_data = fetch_github_data_concurrently({
+            'repo_info': (get_github_repo_info, base_url, api_cache),
+            'views': (get_github_data, f"{base_url}/traffic/views", api_cache),
+            'clones': (get_github_data, f"{base_url}/traffic/clones", api_cache),
+            'referrers': (get_github_data, f"{base_url}/traffic/popular/referrers", api_cache),
+            'popular_content': (get_github_data, f"{base_url}/traffic/popular/paths", api_cache),
+            'stars': (get_stars_data, owner, repo, graphql_cursors, base_totals),
+            'forks': (get_forks_data, owner, repo, graphql_cursors, base_totals),
+        })
+        save_api_cache(db_client, sanitized_repo, api_cache, db_type)
+        repo_info = github_data['repo_info']
+        views_data = github_data['views']
+        clones_data = github_data['clones']
+        referrers_data = github_data['referrers']
+        popular_content_data = github_data['popular_content']
+        stars_data = github_data['stars'] or []
+        forks_data = github_data['forks'] or []
+
+        # Nothing came back from any REST endpoint (bad token, missing repo or no network), so stop before
+        # processing and writing empty results over the stored history
+        if all(result is None for result in (repo_info, views_data, clones_data, referrers_data, popular_content_data)):
+            logger.error(f"All GitHub requests for {owner}/{repo} failed; skipping database and report updates")
+            return False
 
-        # Fetch repository info
-        repo_info = get_github_repo_info(base_url, token)
+        logger.info(f"Fetched data for repository: {owner}/{repo}")
 
         if repo_info:
             about_data = process_about_data(repo_info, owner, repo)
@@ -52,21 +171,13 @@ def retrieve_and_process_stats(owner, repo, filename,
         else:
             about_df = pd.DataFrame(columns=['Repo Owner', 'Repo Name', 'About'])
 
-        # Fetch and process data from GitHub API
-        views_data = get_github_data(f"{base_url}/traffic/views", token)
-        clones_data = get_github_data(f"{base_url}/traffic/clones", token)
-        referrers_data = get_github_data(f"{base_url}/traffic/popular/referrers", token)
-        popular_content_data = get_github_data(f"{base_url}/traffic/popular/paths", token)
-        stars_data = get_stars_data(base_url, token)
-        forks_data = get_forks_data(base_url, token)
-
-        logger.info(f"Fetched data for repository: {owner}/{repo}")
-
-        # Convert the processed data to DataFrames
-        referrers_df = pd.DataFrame(process_referrers_data(referrers_data, owner, repo))
-        popular_content_df = pd.DataFrame(process_popular_content_data(popular_content_data, owner, repo))
-        stars_df = pd.DataFrame(process_stars_data(stars_data, owner, repo, db_client, db_type))
-        forks_df = pd.DataFrame(process_forks_data(forks_data, owner, repo, db_client, db_type))
+        # Process the data into DataFrames
+        # Both snapshots share one FetchedAt for the run
+        fetched_at = datetime.now().strftime('%m-%d-%Y')
+        referrers_df = process_referrers_data(referrers_data, owner, repo, fetched_at)
+        popular_content_df = process_popular_content_data(popular_content_data, owner, repo, fetched_at)
+        stars_df = process_stars_data(stars_data, owner, repo, db_client, db_type, base_totals.get('stargazers', 0))
+        forks_df = process_forks_data(forks_data, owner, repo, db_client, db_type, base_totals.get('forks', 0))
 
         # Process and append the new data
         traffic_data_processed = process_traffic_data(views_data, owner, repo)
@@ -74,24 +185,34 @@ def retrieve_and_process_stats(owner, repo, filename,
         clones_data_processed = process_clones_data(clones_data, owner, repo)
         clones_df = append_new_data(db_client, sanitized_repo, "GitClones", clones_data_processed, 'Date', db_type)
 
-        # Save to database
-        ensure_collection_exists(db_client, sanitized_repo, "About", db_type)
-        save_data(db_client, sanitized_repo, "About", about_df.to_dict('records'), db_type, owner, repo)
-
-        ensure_collection_exists(db_client, sanitized_repo, "TrafficStats", db_type)
-        save_data(db_client, sanitized_repo, "TrafficStats", traffic_df.to_dict('records'), db_type, owner, repo)
-
-        ensure_collection_exists(db_client, sanitized_repo, "GitClones", db_type)
-        save_data(db_client, sanitized_repo, "GitClones", clones_df.to_dict('records'), db_type, owner, repo)
-
-        ensure_collection_exists(db_client, sanitized_repo, "Stars", db_type)
-        save_data(db_client, sanitized_repo, "Stars", stars_df.to_dict('records'), db_type, owner, repo)
-
-        ensure_collection_exists(db_client, sanitized_repo, "Forks", db_type)
-        save_data(db_client, sanitized_repo, "Forks", forks_df.to_dict('records'), db_type, owner, repo)
+        # Save to database; the collections are independent, so they are written in parallel
+        collections_to_save = {'About': about_df, 'Stars': stars_df, 'Forks': forks_df}
+        # append_new_data already upserted the new traffic/clones rows into MongoDB; Cosmos DB
+        # still needs them, but only the freshly fetched rows rather than the whole history
+        if db_type == "cosmosdb":
+            collections_to_save['TrafficStats'] = traffic_data_processed
+            collections_to_save['GitClones'] = clones_data_processed
+        save_collections_concurrently(db_client, sanitized_repo, collections_to_save, db_type, owner, repo)
+
+        if db_type == "mongodb":
+            # A connection whose base total no longer matched GitHub was refetched in full and its recomputed
+            # totals upserted above; days that no longer have any stars or forks still hold stale totals
+            rebuilt_frames = {'stargazers': stars_df, 'forks': forks_df}
+            for connection in resumed_connections - base_totals.keys():
+                delete_other_dates_from_mongodb(db_client, sanitized_repo, INCREMENTAL_CONNECTIONS[connection][0],
+                                                rebuilt_frames[connection]['Date'])
+            # Only save the cursors once the stars and forks they cover are stored
+            save_graphql_cursors(db_client, sanitized_repo, graphql_cursors)
+            # Only days with new stars or forks were processed, so report the full stored history
+            stars_df = sort_by_date(fetch_all_data_from_mongodb(db_client, sanitized_repo, "Stars"))
+            forks_df = sort_by_date(fetch_all_data_from_mongodb(db_client, sanitized_repo, "Forks"))
 
         logger.info("Data saved to database")
 
+        # Stars and forks are the longest histories; keep them as Arrow columns instead of Python objects
+        stars_df = stars_df.convert_dtypes(dtype_backend='pyarrow')
+        forks_df = forks_df.convert_dtypes(dtype_backend='pyarrow')
+
         # Define the dataframes dictionary
         dataframes = {
             'About': about_df,
@@ -103,9 +224,26 @@ def retrieve_and_process_stats(owner, repo, filename,
 
         # Handle Azure Blob Storage uploads
         handle_azure_blob_storage(azure_storage_connection_string, dataframes, base_filename, output_format, use_managed_identity)
+        return True
 
     except Exception as e:
         logger.exception(f"An error occurred: {e}")
+        return False
+
+def save_collections_concurrently(db_client, database_name, collections, db_type, owner, repo):
+    """Create and write each collection on its own thread, re-raising the first failure."""
+    with ThreadPoolExecutor(max_workers=len(collections)) as executor:
+        futures = [
+            executor.submit(save_collection, db_client, database_name, collection_name, data, db_type, owner, repo)
+            for collection_name, data in collections.items()
+        ]
+        for future in as_completed(futures):
+            future.result()
+
+def save_collection(db_client, database_name, collection_name, data, db_type, owner, repo):
+    """Make sure a collection exists, then write the data to it."""
+    ensure_collection_exists(db_client, database_name, collection_name, db_type)
+    save_data(db_client, database_name, collection_name, data, db_type, owner, repo)
 
 def ensure_collection_exists(db_client, repo, collection_name, db_type):
     """Ensure that the collection exists in the database."""
@@ -132,46 +270,101 @@ def get_db_client(connection_string, db_type):
 def handle_azure_blob_storage(connection_string, dataframes, base_filename, output_format, use_managed_identity):
     """Handle uploading dataframes to Azure Blob Storage."""
     if connection_string:
-        container_name = sanitize_name(base_filename)
-
-        # Upload JSON files directly to Azure Blob Storage
-        if output_format in ['json', 'all']:
-            upload_json_to_azure_blob(connection_string, dataframes, base_filename, container_name, use_managed_identity)
+        uploads = {
+            'json': upload_json_to_azure_blob,
+            'parquet': upload_parquet_to_azure_blob,
+            'excel': upload_excel_to_azure_blob
+        }
+        selected_formats = [fmt for fmt in uploads if output_format in [fmt, 'all']]
+        if not selected_formats:
+            logger.warning(f"Unknown output format '{output_format}'; skipping Azure Blob Storage uploads")
+            return
 
-        # Upload Excel file directly to Azure Blob Storage
-        if output_format in ['excel', 'all']:
-            upload_excel_to_azure_blob(connection_string, dataframes, base_filename, container_name, use_managed_identity)
+        container_name = sanitize_name(base_filename)
+        # Build the client once so every upload shares the credential and HTTP pipeline
+        blob_service_client = create_blob_service_client(connection_string, use_managed_identity)
+        ensure_blob_container_exists(blob_service_client, container_name)
+
+        # The formats are independent, so with 'all' the Excel workbook is built while JSON and Parquet upload
+        with ThreadPoolExecutor(max_workers=len(selected_formats)) as executor:
+            futures = {
+                executor.submit(uploads[fmt], blob_service_client, dataframes, base_filename,
+                                container_name, use_managed_identity): fmt
+                for fmt in selected_formats
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Error uploading {futures[future]} output: {e}")
     else:
         save_files_locally(dataframes, base_filename, output_format)
 
-def upload_json_to_azure_blob(connection_string, dataframes, base_filename, container_name, use_managed_identity):
-    """Upload JSON dataframes to Azure Blob Storage."""
-    for df_name, df in dataframes.items():
-        json_bytes = BytesIO()
-        # Ensure dates are formatted as strings
-        df = df.copy()
-        for col in df.columns:
-            if 'Date' in col or 'FetchedAt' in col:
-                df[col] = df[col].astype(str)
-        df.to_json(json_bytes, orient='records', date_format='iso')
-        json_bytes.seek(0)
-        json_file_name = f"{base_filename}-{df_name}.json"
-        azure_blob_url = upload_to_azure_blob_stream(
-            connection_string,
-            container_name,
-            json_bytes,
-            json_file_name,
-            directory='json/',
-            use_managed_identity=use_managed_identity
-        )
-        logger.info(f"JSON file uploaded to Azure Blob Storage: {azure_blob_url}")
+def upload_json_to_azure_blob(blob_service_client, dataframes, base_filename, container_name, use_managed_identity):
+    """Upload JSON dataframes to Azure Blob Storage concurrently."""
+    upload_dataframes_concurrently(upload_dataframe_as_json, blob_service_client, dataframes, base_filename, 'json', container_name, use_managed_identity)
+
+def upload_parquet_to_azure_blob(blob_service_client, dataframes, base_filename, container_name, use_managed_identity):
+    """Upload Parquet dataframes to Azure Blob Storage concurrently."""
+    upload_dataframes_concurrently(upload_dataframe_as_parquet, blob_service_client, dataframes, base_filename, 'parquet', container_name, use_managed_identity)
+
+def upload_dataframes_concurrently(upload_func, blob_service_client, dataframes, base_filename, extension, container_name, use_managed_identity):
+    """Run one upload per dataframe on a thread pool."""
+    with ThreadPoolExecutor(max_workers=len(dataframes)) as executor:
+        futures = {
+            executor.submit(upload_func, blob_service_client, df, f"{base_filename}-{df_name}.{extension}",
+                            container_name, use_managed_identity): df_name
+            for df_name, df in dataframes.items()
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Error uploading {futures[future]} {extension} file: {e}")
+
+def dataframe_to_json_bytes(df):
+    """Serialize a dataframe to a JSON array of records with orjson."""
+    # Ensure dates are formatted as strings
+    df = df.copy()
+    for col in df.columns:
+        if 'Date' in col or 'FetchedAt' in col:
+            df[col] = df[col].astype(str)
+    return orjson.dumps(df.to_dict('records'), option=orjson.OPT_SERIALIZE_NUMPY)
+
+def upload_dataframe_as_json(blob_service_client, df, json_file_name, container_name, use_managed_identity):
+    """Serialize a single dataframe to JSON and upload it to Azure Blob Storage."""
+    json_bytes = BytesIO(dataframe_to_json_bytes(df))
+    azure_blob_url = upload_to_azure_blob_stream(
+        blob_service_client,
+        container_name,
+        json_bytes,
+        json_file_name,
+        directory='json/',
+        use_managed_identity=use_managed_identity
+    )
+    logger.info(f"JSON file uploaded to Azure Blob Storage: {azure_blob_url}")
+
+def upload_dataframe_as_parquet(blob_service_client, df, parquet_file_name, container_name, use_managed_identity):
+    """Serialize a single dataframe to Parquet and upload it to Azure Blob Storage."""
+    parquet_bytes = BytesIO()
+    df.to_parquet(parquet_bytes, engine='pyarrow', compression='zstd', index=False)
+    parquet_bytes.seek(0)
+    azure_blob_url = upload_to_azure_blob_stream(
+        blob_service_client,
+        container_name,
+        parquet_bytes,
+        parquet_file_name,
+        directory='parquet/',
+        use_managed_identity=use_managed_identity
+    )
+    logger.info(f"Parquet file uploaded to Azure Blob Storage: {azure_blob_url}")
 
-def upload_excel_to_azure_blob(connection_string, dataframes, base_filename, container_name, use_managed_identity):
+def upload_excel_to_azure_blob(blob_service_client, dataframes, base_filename, container_name, use_managed_identity):
     """Upload Excel dataframes to Azure Blob Storage."""
     excel_bytes = create_excel_file(dataframes)
     excel_file_name = f"{base_filename}.xlsx"
     azure_blob_url = upload_to_azure_blob_stream(
-        connection_string,
+        blob_service_client,
         container_name,
         excel_bytes,
         excel_file_name,
@@ -196,151 +389,208 @@ def save_files_locally(dataframes, base_filename, output_format):
     if output_format in ['json', 'all']:
         for df_name, df in dataframes.items():
             json_file_path = os.path.join(output_directory, f"{base_filename}-{df_name}.json")
-            # Ensure dates are formatted as strings
-            df = df.copy()
-            for col in df.columns:
-                if 'Date' in col or 'FetchedAt' in col:
-                    df[col] = df[col].astype(str)
-            df.to_json(json_file_path, orient='records', date_format='iso')
+            with open(json_file_path, 'wb') as f:
+                f.write(dataframe_to_json_bytes(df))
             logger.info(f"JSON file saved locally at: {json_file_path}")
 
+    if output_format in ['parquet', 'all']:
+        for df_name, df in dataframes.items():
+            parquet_file_path = os.path.join(output_directory, f"{base_filename}-{df_name}.parquet")
+            df.to_parquet(parquet_file_path, engine='pyarrow', compression='zstd', index=False)
+            logger.info(f"Parquet file saved locally at: {parquet_file_path}")
+
 def create_excel_file(dataframes):
     """Create an Excel file from dataframes and return it as BytesIO."""
     excel_bytes = BytesIO()
-    with pd.ExcelWriter(excel_bytes, engine='openpyxl') as writer:
-        for df_name, df in dataframes.items():
-            # Ensure date columns are formatted as strings in MM-DD-YYYY format
-            df = df.copy()
-            for col in df.columns:
-                if 'Date' in col or 'FetchedAt' in col:
-                    df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime('%m-%d-%Y')
-            df.to_excel(writer, sheet_name=df_name, index=False)
-            format_excel_sheet(writer, df_name, df)
+    # constant_memory flushes each row as soon as the next one starts, so rows must be written in order
+    workbook = xlsxwriter.Workbook(excel_bytes, {
+        'constant_memory': True,
+        'strings_to_formulas': False,
+        'strings_to_urls': False
+    })
+    header_format = workbook.add_format({'bold': True})
+    for df_name, df in dataframes.items():
+        # Ensure date columns are formatted as strings in MM-DD-YYYY format
+        df = df.copy()
+        for col in df.columns:
+            if 'Date' in col or 'FetchedAt' in col:
+                df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime('%m-%d-%Y')
+        write_excel_sheet(workbook, df_name, df, header_format)
+    workbook.close()
     excel_bytes.seek(0)
     return excel_bytes
 
-def format_excel_sheet(writer, sheet_name, df):
-    workbook = writer.book
-    worksheet = writer.sheets[sheet_name]
-    header_font = Font(bold=True)
-    for cell in worksheet['1:1']:  # First row is the header
-        cell.font = header_font
+def write_excel_sheet(workbook, sheet_name, df, header_format):
+    """Write a dataframe to a new worksheet row by row, with a bold header and fitted column widths."""
+    worksheet = workbook.add_worksheet(sheet_name)
 
     # Adjust column widths
-    for col_num, column_title in enumerate(df.columns, 1):
-        column_letter = get_column_letter(col_num)
-        # Ensure all data is converted to string before measuring length
-        df[column_title] = df[column_title].astype(str)
-        column_width = max(df[column_title].map(len).max(), len(column_title))
-        worksheet.column_dimensions[column_letter].width = column_width + 2
-
-    # Format date columns without using NamedStyle
-    for col in df.columns:
-        if 'Date' in col or 'FetchedAt' in col:
-            col_idx = df.columns.get_loc(col) + 1  # Adjust for zero-based index
-            for cell in worksheet.iter_cols(min_col=col_idx, max_col=col_idx, min_row=2):
-                for c in cell:
-                    c.number_format = 'MM-DD-YYYY'  # Set date format directly
-
-def upload_to_azure_blob_stream(connection_string, container_name, stream, blob_name, directory='', use_managed_identity=False):
+    for col_num, column_title in enumerate(df.columns):
+        longest_value = df[column_title].astype(str).str.len().max() if len(df) else 0
+        worksheet.set_column(col_num, col_num, max(longest_value, len(column_title)) + 2)
+
+    worksheet.write_row(0, 0, list(df.columns), header_format)
+    # Missing values become empty cells
+    values = df.astype(object).where(df.notna(), None)
+    for row_num, row in enumerate(values.itertuples(index=False, name=None), 1):
+        worksheet.write_row(row_num, 0, row)
+
+def ensure_blob_container_exists(blob_service_client, container_name):
+    """Create the container once per process before uploading."""
+    container_key = (blob_service_client.account_name, container_name)
+    if container_key in CREATED_CONTAINERS:
+        return
+    container_client = blob_service_client.get_container_client(container_name)
     try:
-        blob_service_client = create_blob_service_client(connection_string, use_managed_identity)
-        container_client = blob_service_client.get_container_client(container_name)
-
+        container_client.get_container_properties()
+        logger.info(f"Container '{container_name}' already exists.")
+    except ResourceNotFoundError:
         try:
             container_client.create_container()
         except ResourceExistsError:
-            logger.info(f"Container '{container_name}' already exists.")
-        except Exception as e:
-            logger.error(f"Error creating container: {e}")
-            return
+            # Another worker created it between the check and the create
+            pass
+    CREATED_CONTAINERS.add(container_key)
 
+def upload_to_azure_blob_stream(blob_service_client, container_name, stream, blob_name, directory='', use_managed_identity=False):
+    try:
         full_blob_name = f"{directory}{blob_name}" if directory else blob_name
         blob_client = blob_service_client.get_blob_client(container=container_name, blob=full_blob_name)
-        blob_client.upload_blob(stream, overwrite=True)
+        # Passing the length lets the SDK split the stream into blocks and upload them in parallel
+        content_type = BLOB_CONTENT_TYPES.get(os.path.splitext(blob_name)[1], 'application/octet-stream')
+        blob_client.upload_blob(
+            stream,
+            length=stream.getbuffer().nbytes,
+            overwrite=True,
+            blob_type='BlockBlob',
+            max_concurrency=8,
+            content_settings=ContentSettings(content_type=content_type)
+        )
 
         if not use_managed_identity:
             sas_token = generate_blob_sas(
-                account_name=blob_service_client.account_name,
+                account_name=blob_client.account_name,
                 container_name=container_name,
                 blob_name=full_blob_name,
                 account_key=blob_service_client.credential.account_key,
                 permission=BlobSasPermissions(read=True),
                 expiry=datetime.utcnow() + timedelta(hours=24)
             )
-            return f"https://{blob_service_client.account_name}.blob.core.windows.net/{container_name}/{full_blob_name}?{sas_token}"
+            return f"{blob_client.url}?{sas_token}"
         else:
-            return f"https://{blob_service_client.account_name}.blob.core.windows.net/{container_name}/{full_blob_name}"
+            return blob_client.url
     except Exception as e:
         logger.error(f"An error occurred while uploading to Azure Blob Storage: {e}")
 
+# Cached like the database clients, so repeated runs in one process share the HTTP pipeline and credential
+@lru_cache(maxsize=None)
 def create_blob_service_client(connection_string, use_managed_identity=False):
     if use_managed_identity:
-        credential = DefaultAzureCredential()
-        return BlobServiceClient(account_url=connection_string, credential=credential)
-    return BlobServiceClient.from_connection_string(connection_string)
-
-def get_github_data(api_url, token):
-    headers = {'Authorization': f'token {token}'}
-    response = requests.get(api_url, headers=headers)
-    if response.status_code == 200:
-        return response.json()
+        # The interactive browser flow never succeeds unattended; skip it in the credential chain
+        credential = DefaultAzureCredential(exclude_interactive_browser_credential=True)
+        client = BlobServiceClient(account_url=connection_string, credential=credential,
+                                   max_single_put_size=BLOB_BLOCK_SIZE, max_block_size=BLOB_BLOCK_SIZE)
     else:
-        logger.error(f"Failed to fetch data: {response.status_code} - {response.text}")
-        return None
-
-def get_github_repo_info(api_url, token):
-    headers = {'Authorization': f'token {token}'}
-    response = requests.get(api_url, headers=headers)
+        client = BlobServiceClient.from_connection_string(connection_string,
+                                                          max_single_put_size=BLOB_BLOCK_SIZE, max_block_size=BLOB_BLOCK_SIZE)
+    atexit.register(client.close)
+    return client
+
+def fetch_github_data_concurrently(fetches):
+    """Run independent GitHub fetches on a thread pool and return their results by name."""
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(fetches)) as executor:
+        futures = {executor.submit(func, *args): name for name, (func, *args) in fetches.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                # One failing endpoint should not discard the others
+                logger.error(f"Error fetching {name} data: {e}")
+                results[name] = None
+    return results
+
+def get_github_data(api_url, api_cache=None):
+    return get_github_json(api_url, api_cache, "Failed to fetch data")
+
+def get_github_repo_info(api_url, api_cache=None):
+    return get_github_json(api_url, api_cache, "Failed to fetch repository info")
+
+def get_github_json(api_url, api_cache, error_message):
+    """GET a GitHub endpoint, revalidating the body cached from the last run with its ETag."""
+    cached = api_cache.get(api_url) if api_cache is not None else None
+    headers = {'If-None-Match': cached['etag']} if cached else {}
+    response = SESSION.get(api_url, headers=headers, timeout=GITHUB_TIMEOUT)
+    if response.status_code == 304:
+        # Unchanged since the last run; 304s carry no body and do not count against the rate limit
+        logger.info(f"Not modified since last run: {api_url}")
+        return cached['last_body']
     if response.status_code == 200:
-        return response.json()
-    else:
-        logger.error(f"Failed to fetch repository info: {response.status_code} - {response.text}")
+        data = orjson.loads(response.content)
+        if api_cache is not None and response.headers.get('ETag'):
+            api_cache[api_url] = {'etag': response.headers['ETag'], 'last_body': data}
+        return data
+    # Error bodies can be large HTML pages; the start is enough to tell what went wrong
+    logger.error(f"{error_message} from {api_url}: {response.status_code} - {response.text[:200]}")
+    return None
+
+def gh_graphql(query, variables):
+    """Run a query against the GitHub GraphQL API and return its data payload."""
+    response = SESSION.post(GITHUB_GRAPHQL_URL, json={'query': query, 'variables': variables}, timeout=GITHUB_TIMEOUT)
+    if response.status_code != 200:
+        logger.error(f"GraphQL request failed: {response.status_code} - {response.text[:200]}")
+        return None
+    payload = orjson.loads(response.content)
+    if payload.get('errors'):
+        logger.error(f"GraphQL query returned errors: {payload['errors']}")
         return None
+    return payload.get('data')
 
-def get_stars_data(api_url, token):
-    stars_data = []
-    page = 1
+def walk_graphql_connection(query, owner, repo, connection_name, cursor=None):
+    """Page through a repository connection after cursor; return its edges, last cursor and totalCount (None if a page failed)."""
+    edges = []
     while True:
-        headers = {
-            'Authorization': f'token {token}',
-            'Accept': 'application/vnd.github.v3.star+json'
-        }
-        url = f"{api_url}/stargazers?page={page}&per_page=100"
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            data = response.json()
-            if data:
-                stars_data.extend(data)
-                page += 1
-            else:
-                break
+        data = gh_graphql(query, {'owner': owner, 'repo': repo, 'cursor': cursor})
+        if not data or not data.get('repository'):
+            return edges, cursor, None
+        connection = data['repository'][connection_name]
+        edges.extend(connection['edges'])
+        # endCursor is null on an empty page, so keep the previous position
+        cursor = connection['pageInfo']['endCursor'] or cursor
+        if not connection['pageInfo']['hasNextPage']:
+            return edges, cursor, connection['totalCount']
+
+def get_graphql_connection_edges(query, owner, repo, connection_name, cursors=None, base_totals=None):
+    """Walk a paginated repository connection, resuming after and advancing its entry in cursors if given."""
+    start = cursors.get(connection_name) if cursors is not None else None
+    edges, cursor, total_count = walk_graphql_connection(query, owner, repo, connection_name, start)
+    # Removed stars or forks leave the stored base total too high, so when it plus the new edges no longer
+    # adds up to GitHub's count, refetch from the start; a removal offset by an equal number of additions
+    # between runs still adds up and goes unnoticed
+    base_total = base_totals.get(connection_name, 0) if base_totals is not None else None
+    if start is not None and base_total is not None and total_count is not None and base_total + len(edges) != total_count:
+        logger.warning(f"Stored {connection_name} total {base_total} plus {len(edges)} new does not match "
+                       f"GitHub's {total_count} for {owner}/{repo}; refetching from the start")
+        full_edges, full_cursor, full_total = walk_graphql_connection(query, owner, repo, connection_name)
+        # Only rebuild from the refetch once it reached the end and accounts for every edge; otherwise keep
+        # the incremental result so the stored history stays intact and the check runs again next time
+        if full_total is not None and len(full_edges) == full_total:
+            edges, cursor = full_edges, full_cursor
+            base_totals.pop(connection_name)
         else:
-            logger.error(f"Failed to fetch stars data: {response.status_code} - {response.text}")
-            break
-    return stars_data
+            logger.warning(f"Refetch of {connection_name} for {owner}/{repo} did not complete; keeping the incremental result")
+    if cursors is not None and cursor:
+        cursors[connection_name] = cursor
+    return edges
 
-def get_forks_data(api_url, token):
-    forks_data = []
-    page = 1
-    while True:
-        headers = {
-            'Authorization': f'token {token}',
-            'Accept': 'application/vnd.github.v3+json'
-        }
-        url = f"{api_url}/forks?page={page}&per_page=100"
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            data = response.json()
-            if data:
-                forks_data.extend(data)
-                page += 1
-            else:
-                break
-        else:
-            logger.error(f"Failed to fetch forks data: {response.status_code} - {response.text}")
-            break
-    return forks_data
+def get_stars_data(owner, repo, cursors=None, base_totals=None):
+    edges = get_graphql_connection_edges(STARGAZERS_QUERY, owner, repo, 'stargazers', cursors, base_totals)
+    return [{'starred_at': edge['starredAt']} for edge in edges]
+
+def get_forks_data(owner, repo, cursors=None, base_totals=None):
+    edges = get_graphql_connection_edges(FORKS_QUERY, owner, repo, 'forks', cursors, base_totals)
+    return [{'created_at': edge['node']['createdAt']} for edge in edges]
 
 def process_about_data(repo_info, owner, repo):
     about_text = repo_info.get('description', None)
@@ -350,104 +600,72 @@ def process_about_data(repo_info, owner, repo):
         "About": about_text
     }
 
-def process_stars_data(stars_data, owner, repo, db_client, db_type):
-    """Process stars data and return the incremental difference of stars each day."""
-    cumulative_count = {}
-    total_stars = 0
-    sorted_data = sorted(stars_data, key=lambda x: x['starred_at'])
-
-    for star_info in sorted_data:
-        date = star_info['starred_at'].split('T')[0]
-        total_stars += 1
-        cumulative_count[date] = total_stars
-
-    processed_data = [
-        {"Repo Owner": owner,
-         "Repo Name": repo,
-         "Date": datetime.strptime(date, '%Y-%m-%d').strftime('%m-%d-%Y'),
-         "Total Stars": cumulative_count[date] - (cumulative_count.get(date, 0) - 1)}  # Mapping Stars Added to Total Stars
-        for date in cumulative_count
-    ]
-    
-    return processed_data
-
-
-def process_forks_data(forks_data, owner, repo, db_client, db_type):
-    """Process forks data and return the incremental difference of forks each day."""
-    cumulative_count = {}
-    total_forks = 0
-    sorted_data = sorted(forks_data, key=lambda x: x['created_at'])
-
-    for fork_info in sorted_data:
-        date = fork_info['created_at'].split('T')[0]
-        total_forks += 1
-        cumulative_count[date] = total_forks
-
-    processed_data = [
-        {"Repo Owner": owner,
-         "Repo Name": repo,
-         "Date": datetime.strptime(date, '%Y-%m-%d').strftime('%m-%d-%Y'),
-         "Total Forks": cumulative_count[date] - (cumulative_count.get(date, 0) - 1)}  # Mapping Forks Added to Total Forks
-        for date in cumulative_count
-    ]
-    
-    return processed_data
-
+def add_repo_columns(df, owner, repo):
+    """Prepend the Repo Owner/Repo Name columns as single broadcast values."""
+    df.insert(0, "Repo Owner", owner)
+    df.insert(1, "Repo Name", repo)
+    return df
+
+def count_running_total_by_day(timestamps, count_column, owner, repo, base_total=0):
+    """Count timestamps per day and return the running total for each day that has any."""
+    # ISO timestamps start with YYYY-MM-DD, so the day strings group and sort chronologically as-is
+    days = pd.Series(timestamps, dtype=object).str.slice(0, 10)
+    # The GraphQL queries order edges oldest first, so only sort the day keys when they arrive out of order
+    totals = days.groupby(days, sort=not days.is_monotonic_increasing).size().cumsum() + base_total
+    # Only the distinct days need parsing
+    dates = pd.to_datetime(totals.index, format='%Y-%m-%d').strftime('%m-%d-%Y')
+    df = pd.DataFrame({"Date": dates, count_column: totals.to_numpy()})
+    return add_repo_columns(df, owner, repo)
+
+def process_stars_data(stars_data, owner, repo, db_client, db_type, base_total=0):
+    """Process stars data and return the total number of stars at the end of each day."""
+    return count_running_total_by_day([star_info['starred_at'] for star_info in stars_data], "Total Stars", owner, repo, base_total)
+
+
+def process_forks_data(forks_data, owner, repo, db_client, db_type, base_total=0):
+    """Process forks data and return the total number of forks at the end of each day."""
+    return count_running_total_by_day([fork_info['created_at'] for fork_info in forks_data], "Total Forks", owner, repo, base_total)
+
+
+def build_daily_traffic_frame(items, count_column, uniques_column, owner, repo):
+    """Turn GitHub's per-day traffic entries into a frame with MM-DD-YYYY dates."""
+    df = pd.DataFrame(items, columns=['timestamp', 'count', 'uniques'])
+    # Parse the whole column at once with the known ISO date format instead of strptime per entry
+    dates = pd.to_datetime(df['timestamp'].astype('string').str.slice(0, 10), format='%Y-%m-%d', errors='coerce', cache=True)
+    df = pd.DataFrame({
+        "Date": dates.dt.strftime('%m-%d-%Y'),
+        count_column: df['count'],
+        uniques_column: df['uniques']
+    })
+    return add_repo_columns(df, owner, repo)
 
 def process_traffic_data(data, owner, repo):
     if not data or 'views' not in data:
         logger.warning("No traffic data available.")
         return []
-    return [
-        {"Repo Owner": owner,
-         "Repo Name": repo,
-         "Date": datetime.strptime(item.get('timestamp', '')[:10], '%Y-%m-%d').strftime('%m-%d-%Y') if item.get('timestamp') else None,
-         "Views": item.get('count', None),
-         "Unique visitors": item.get('uniques', None)}
-        for item in data.get('views', [])
-    ]
+    return build_daily_traffic_frame(data['views'], "Views", "Unique visitors", owner, repo)
 
 def process_clones_data(data, owner, repo):
     if not data or 'clones' not in data:
         logger.warning("No clones data available.")
         return []
-    return [
-        {"Repo Owner": owner,
-         "Repo Name": repo,
-         "Date": datetime.strptime(item.get('timestamp', '')[:10], '%Y-%m-%d').strftime('%m-%d-%Y') if item.get('timestamp') else None,
-         "Clones": item.get('count', None),
-         "Unique cloners": item.get('uniques', None)}
-        for item in data.get('clones', [])
-    ]
-
-def process_referrers_data(data, owner, repo):
+    return build_daily_traffic_frame(data['clones'], "Clones", "Unique cloners", owner, repo)
+
+def process_referrers_data(data, owner, repo, fetched_at):
     if data is None:
         return []
-    timestamp = datetime.now().strftime('%m-%d-%Y')
-    return [
-        {"Repo Owner": owner,
-         "Repo Name": repo,
-         "Referring site": item.get('referrer', None),
-         "Views": item.get('count', None),
-         "Unique visitors": item.get('uniques', None),
-         "FetchedAt": timestamp}
-        for item in data
-    ]
-
-def process_popular_content_data(data, owner, repo):
+    df = pd.DataFrame(data, columns=['referrer', 'count', 'uniques']).rename(
+        columns={'referrer': "Referring site", 'count': "Views", 'uniques': "Unique visitors"})
+    df["FetchedAt"] = fetched_at
+    return add_repo_columns(df, owner, repo)
+
+def process_popular_content_data(data, owner, repo, fetched_at):
     if data is None:
         return []
-    timestamp = datetime.now().strftime('%m-%d-%Y')
-    return [
-        {"Repo Owner": owner,
-         "Repo Name": repo,
-         "Path": item.get('path', None),
-         "Title": item.get('title', None),
-         "Views": item.get('count', None),
-         "Unique visitors": item.get('uniques', None),
-         "FetchedAt": timestamp}
-        for item in data
-    ]
+    df = pd.DataFrame(data, columns=['path', 'title', 'count', 'uniques']).rename(
+        columns={'path': "Path", 'title': "Title", 'count': "Views", 'uniques': "Unique visitors"})
+    df["FetchedAt"] = fetched_at
+    return add_repo_columns(df, owner, repo)
 
 def read_token_from_file(file_path):
     try:
@@ -457,11 +675,61 @@ def read_token_from_file(file_path):
         logger.error(f"Error reading token file: {e}")
         return None
 
+def parse_repos_csv(source):
+    """Parse owner,repo lines from a path or file-like object into (owner, repo) tuples."""
+    repos_df = pd.read_csv(source, header=None, names=['owner', 'repo'], usecols=[0, 1], dtype=str, skipinitialspace=True)
+    repos_df = repos_df.dropna()
+    return list(zip(repos_df['owner'].str.strip(), repos_df['repo'].str.strip()))
+
+def read_repos_file(file_path):
+    """Read owner,repo pairs from a local CSV file."""
+    try:
+        return parse_repos_csv(file_path)
+    except (IOError, pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+        logger.error(f"Error reading repos file: {e}")
+        return []
+
+def read_file_from_azure_blob(connection_string, container_name, blob_name, use_managed_identity=False):
+    """Read owner,repo pairs from a CSV blob in Azure Blob Storage."""
+    try:
+        blob_service_client = create_blob_service_client(connection_string, use_managed_identity)
+        blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob_name)
+        return parse_repos_csv(BytesIO(blob_client.download_blob().readall()))
+    except Exception as e:
+        logger.error(f"Error reading '{blob_name}' from Azure Blob Storage: {e}")
+        return []
+
+def process_repos_in_parallel(repos, db_connection_string, db_type, azure_storage_connection_string,
+                              output_format, token, use_managed_identity, max_workers):
+    """Process each repository in its own worker process."""
+    # Each worker builds its own GitHub, database and storage clients; max_workers bounds
+    # how many repositories hit the GitHub API at once.
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(retrieve_and_process_stats, owner, repo, f"{owner}-{repo}-traffic-data",
+                            db_connection_string, db_type, azure_storage_connection_string,
+                            output_format, token, use_managed_identity): (owner, repo)
+            for owner, repo in repos
+        }
+        for future in as_completed(futures):
+            owner, repo = futures[future]
+            # retrieve_and_process_stats logs and swallows its own errors, so failures come back as False;
+            # the except only catches a worker process that died
+            try:
+                if future.result():
+                    logger.info(f"Finished processing {owner}/{repo}")
+                else:
+                    logger.error(f"Processing {owner}/{repo} failed or stopped early; see the errors logged above")
+            except Exception as e:
+                logger.error(f"Error processing {owner}/{repo}: {e}")
+
 def main():
     parser = argparse.ArgumentParser(description='GitHub Repository Traffic Data Fetcher')
-    parser.add_argument('--repo', required=True, help='Repository name')
-    parser.add_argument('--owner', required=True, help='Organization/user name that owns the repository')
-    parser.add_argument('--output-format', choices=['excel', 'json', 'all'], default='excel', help='Output format for the data (excel, json, or all)')
+    parser.add_argument('--repo', help='Repository name')
+    parser.add_argument('--owner', help='Organization/user name that owns the repository')
+    parser.add_argument('--repos-file', help='Optional: Path to a CSV file of owner,repo pairs to process in parallel instead of --owner/--repo')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count(), help='Optional: Number of repositories to process concurrently with --repos-file (defaults to the CPU count)')
+    parser.add_argument('--output-format', choices=['excel', 'json', 'parquet', 'all'], default='excel', help='Output format for the data (excel, json, parquet, or all)')
     parser.add_argument('--filename', help='Optional: Specify a filename for the output. If not provided, defaults to {owner}-{repo}-traffic-data')
     parser.add_argument('--token-file', required=True, help='Path to a text file containing the GitHub Personal Access Token')
     parser.add_argument('--db-connection-string', required=True, help='Database connection string to store and retrieve the data')
@@ -470,12 +738,24 @@ def main():
     parser.add_argument('--managed-identity-storage', required=False, action='store_true', help='Use Managed Identity for Azure Blob Storage authentication')
 
     args = parser.parse_args()
+    if not args.repos_file and not (args.owner and args.repo):
+        parser.error('either --repos-file or both --owner and --repo are required')
+    if args.max_workers < 1:
+        parser.error('--max-workers must be at least 1')
 
     token = read_token_from_file(args.token_file)
     if not token:
         logger.error("Failed to read GitHub token.")
         return
 
+    if args.repos_file:
+        repos = read_repos_file(args.repos_file)
+        if not repos:
+            logger.warning("No repositories found to process.")
+            return
+        process_repos_in_parallel(repos, args.db_connection_string, args.db_type, args.azure_storage_connection_string, args.output_format, token, args.managed_identity_storage, args.max_workers)
+        return
+
     retrieve_and_process_stats(args.owner, args.repo, args.filename, args.db_connection_string, args.db_type, args.azure_storage_connection_string, args.output_format, token, args.managed_identity_storage)
 
 if __name__ == "__main__":